@@ -0,0 +1,182 @@
+"""
+Shared ingestion and K-Means fitting for cluster_viz.py and cluster_3d.py.
+
+load_vectors streams the embeddings from stdin into a float32 matrix.
+Fits are memoized on disk, keyed on the input vectors and model settings,
+so the 2D and 3D views of the same embeddings only cluster them once.
+sweep_kmeans and print_sweep fit a range of cluster counts in parallel for
+elbow analysis, and sample_for_display thins out large inputs for plotting.
+"""
+
+import sys
+from pathlib import Path
+import ijson
+import numpy as np
+import pandas as pd
+from joblib import Memory, Parallel, delayed
+from sklearn.cluster import KMeans, MiniBatchKMeans
+
+# Above this many items, full-batch K-Means gets slow; switch to mini-batches
+MINIBATCH_THRESHOLD = 5000
+
+# Cluster counts to try with --sweep, for picking k with the elbow method
+SWEEP_K = range(2, 13)
+
+# Above this many items the browser struggles to draw every point, so only a
+# random sample of DISPLAY_PER_CLUSTER points per cluster is plotted
+DISPLAY_THRESHOLD = 50_000
+DISPLAY_PER_CLUSTER = 5000
+
+# Anchored next to this file, so every view shares the cache no matter
+# which directory the scripts are run from
+memory = Memory(Path(__file__).resolve().parent / ".cache", verbose=0)
+
+
+def load_vectors(stream) -> tuple[np.ndarray, list[str]]:
+    """
+    Read a JSON array of {"url": ..., "vector": [...]} records.
+    
+    Records are streamed straight into a growing float32 matrix, so the raw
+    JSON text and the parsed records never have to sit in memory at once.
+    Exits with an error message on empty or malformed input.
+    
+    Args:
+        stream: Binary file object to read from, e.g. sys.stdin.buffer
+        
+    Returns:
+        Tuple of ((n_samples, n_features) vectors, URL for every row)
+    """
+    if not stream.peek(1):
+        print("Error: No input received from stdin.", file=sys.stderr)
+        sys.exit(1)
+
+    vectors = None
+    urls = []
+    try:
+        for r in ijson.items(stream, "item", use_float=True):
+            if vectors is None:
+                vectors = np.empty((1024, len(r["vector"])), dtype=np.float32)
+            elif len(urls) == vectors.shape[0]:
+                # Double the capacity so the number of reallocations stays logarithmic
+                vectors.resize((2 * vectors.shape[0], vectors.shape[1]), refcheck=False)
+            # Assigning a shorter vector would silently broadcast across the row
+            if len(r["vector"]) != vectors.shape[1]:
+                print(
+                    f"Error: vector {len(urls)} has {len(r['vector'])} dimensions, "
+                    f"expected {vectors.shape[1]}",
+                    file=sys.stderr,
+                )
+                sys.exit(1)
+            vectors[len(urls)] = r["vector"]
+            urls.append(r["url"])
+    except ijson.JSONError as e:
+        print(f"Error: Invalid JSON format - {e}", file=sys.stderr)
+        sys.exit(1)
+    except KeyError:
+        print("Error: Input objects must contain 'url' and 'vector' keys.", file=sys.stderr)
+        sys.exit(1)
+
+    if not urls:
+        print("Error: JSON array is empty.", file=sys.stderr)
+        sys.exit(1)
+
+    # Shrink to the rows actually read, releasing the unused capacity
+    vectors.resize((len(urls), vectors.shape[1]), refcheck=False)
+    return vectors, urls
+
+
+def make_kmeans(n_samples: int, n_clusters: int):
+    """Pick full-batch or mini-batch K-Means depending on the input size."""
+    if n_samples > MINIBATCH_THRESHOLD:
+        return MiniBatchKMeans(
+            n_clusters=n_clusters,
+            batch_size=4096,
+            n_init=3,
+            max_iter=100,
+            random_state=42,
+        )
+    # Using k-means++ initialization for better results
+    return KMeans(n_clusters=n_clusters, random_state=42, n_init="auto")
+
+
+def fit_kmeans(vectors: np.ndarray, n_clusters: int) -> np.ndarray:
+    """
+    Cluster the vectors with K-Means, reusing a cached fit when possible.
+    
+    Args:
+        vectors: (n_samples, n_features) matrix to cluster
+        n_clusters: Number of clusters to fit
+        
+    Returns:
+        Cluster label for every row of vectors
+    """
+    # The unfitted estimator is part of the cache key, so changing any of
+    # the settings in make_kmeans triggers a fresh fit
+    return cached_fit_predict(vectors, make_kmeans(len(vectors), n_clusters))
+
+
+@memory.cache
+def cached_fit_predict(vectors: np.ndarray, kmeans) -> np.ndarray:
+    """Fit the given K-Means estimator and return its labels."""
+    return kmeans.fit_predict(vectors)
+
+
+def kmeans_inertia(vectors: np.ndarray, n_clusters: int) -> float:
+    """Fit K-Means and return the within-cluster sum of squares."""
+    return make_kmeans(len(vectors), n_clusters).fit(vectors).inertia_
+
+
+def sweep_kmeans(vectors: np.ndarray, k_values: range) -> list[float]:
+    """
+    Fit K-Means for every cluster count in k_values, one fit per CPU core.
+    
+    Args:
+        vectors: (n_samples, n_features) matrix to cluster
+        k_values: Cluster counts to try, each at most n_samples
+        
+    Returns:
+        Inertia for each cluster count, in the order of k_values
+    """
+    return Parallel(n_jobs=-1, backend="loky")(
+        delayed(kmeans_inertia)(vectors, k) for k in k_values
+    )
+
+
+def print_sweep(vectors: np.ndarray):
+    """
+    Print the K-Means inertia for every cluster count in SWEEP_K to stderr.
+    
+    Args:
+        vectors: (n_samples, n_features) matrix to cluster; cluster counts
+            above n_samples are skipped
+    """
+    print("Sweeping cluster counts...", file=sys.stderr)
+    k_values = range(SWEEP_K.start, min(SWEEP_K.stop, len(vectors) + 1))
+    for k, inertia in zip(k_values, sweep_kmeans(vectors, k_values)):
+        print(f"  k={k:>2}: inertia {inertia:,.1f}", file=sys.stderr)
+
+
+def sample_for_display(df: pd.DataFrame, column: str) -> pd.DataFrame:
+    """
+    Take a stratified random sample of large inputs for plotting.
+    
+    Args:
+        df: One row per item, sorted by column
+        column: Cluster label column to stratify on
+        
+    Returns:
+        df itself if it is small enough to plot, otherwise at most
+        DISPLAY_PER_CLUSTER random rows per cluster, still sorted by column
+    """
+    if len(df) <= DISPLAY_THRESHOLD:
+        return df
+
+    # Shuffle, then keep the first rows of every cluster
+    sample = (
+        df.sample(frac=1, random_state=0)
+        .groupby(column, sort=False)
+        .head(DISPLAY_PER_CLUSTER)
+        .sort_values(column, kind="stable")
+    )
+    print(f"Plotting a sample of {len(sample)} items...", file=sys.stderr)
+    return sample
@@ -1,6 +1,8 @@
 # /// script
 # requires-python = ">=3.10"
 # dependencies = [
+#     "ijson",
+#     "joblib",
 #     "numpy",
 #     "pandas",
 #     "plotly",
@@ -14,62 +16,59 @@ import time
 import numpy as np
 import pandas as pd
 import plotly.express as px
-from sklearn.cluster import KMeans
 from sklearn.decomposition import PCA
+from cluster import fit_kmeans, load_vectors, print_sweep, sample_for_display
 
 # Set default renderer to browser
 import plotly.io as pio
 pio.renderers.default = "browser"
 
+# Number of PCA components K-Means clusters on instead of the raw embedding
+CLUSTER_DIMS = 50
+
 def main():
     # --- 1. Data Ingestion ---
-    try:
-        input_data = sys.stdin.read()
-        if not input_data:
-            print("Error: No input received from stdin.", file=sys.stderr)
-            sys.exit(1)
-        records = json.loads(input_data)
-    except json.JSONDecodeError as e:
-        print(f"Error: Invalid JSON format - {e}", file=sys.stderr)
-        sys.exit(1)
-
-    if not records:
-        print("Error: JSON array is empty.", file=sys.stderr)
-        sys.exit(1)
-
-    try:
-        vectors = np.array([r["vector"] for r in records])
-        urls = [r["url"] for r in records]
-    except KeyError:
-        print("Error: Input objects must contain 'url' and 'vector' keys.", file=sys.stderr)
-        sys.exit(1)
+    vectors, urls = load_vectors(sys.stdin.buffer)
 
     n_samples, n_features = vectors.shape
     print(f"Processing {n_samples} items with {n_features} dimensions...", file=sys.stderr)
 
-    # --- 2. Clustering (K-Means) ---
+    # --- 2. Dimensionality Reduction (PCA) ---
+    # Reduce once up front: K-Means runs on the leading components, which is
+    # much cheaper than clustering the raw embeddings, and the first three
+    # components double as the X, Y, Z plot coordinates.
+    print("Performing dimensionality reduction...", file=sys.stderr)
+    
+    # We need 3 components for X, Y, Z
+    target_dims = 3
+    
+    if n_features > target_dims:
+        n_components = min(CLUSTER_DIMS, n_features, max(n_samples, target_dims))
+        # Randomized SVD only computes the few components we keep
+        pca = PCA(n_components=n_components, svd_solver="randomized", random_state=42)
+        reduced = pca.fit_transform(vectors)
+        coords = reduced[:, :target_dims]
+    elif n_features == target_dims:
+        # Already 3D
+        reduced = coords = vectors
+    else:
+        # Data has < 3 dimensions: cluster it as is and pad with zeros to make it 3D
+        reduced = vectors
+        coords = np.zeros((n_samples, target_dims), dtype=vectors.dtype)
+        coords[:, :n_features] = vectors
+
+    # --- 3. Clustering (K-Means) ---
     # Cap clusters at 8 or n_samples
     n_clusters = min(8, n_samples)
     
     if n_samples > 1:
-        kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init="auto")
-        labels = kmeans.fit_predict(vectors)
+        # Cached on disk, so re-running on the same data skips the fit
+        labels = fit_kmeans(reduced, n_clusters)
     else:
         labels = np.array([0])
 
-    # --- 3. Dimensionality Reduction (3D PCA) ---
-    print("Performing 3D dimensionality reduction...", file=sys.stderr)
-    
-    # We need 3 components for X, Y, Z
-    target_dims = 3
-    
-    if n_features >= target_dims:
-        pca = PCA(n_components=target_dims)
-        coords = pca.fit_transform(vectors)
-    else:
-        # If data has < 3 dimensions, pad with zeros to make it 3D
-        padding = np.zeros((n_samples, target_dims - n_features))
-        coords = np.column_stack((vectors, padding))
+    if "--sweep" in sys.argv and n_samples > 1:
+        print_sweep(reduced)
 
     # --- 4. visualization (3D Plot) ---
     print("Generating 3D interactive plot...", file=sys.stderr)
@@ -82,11 +81,15 @@ def main():
         'URL': urls
     })
     
-    # Sort for tidy legend
-    df = df.sort_values('Cluster')
+    # Sort for tidy legend; a stable sort keeps input order within each cluster
+    df = df.sort_values('Cluster', kind='stable')
+
+    # Plot a stratified sample for large inputs; the JSON output below
+    # still gets every URL
+    display_df = sample_for_display(df, 'Cluster')
 
     fig = px.scatter_3d(
-        df,
+        display_df,
         x='x', 
         y='y', 
         z='z',
@@ -107,15 +110,11 @@ def main():
     
     # Group URLs by Cluster ID for the output file
     # Format: { "0": ["url1", "url2"], "1": ["url3"] ... }
-    cluster_map = {}
-    for label, url in zip(labels, urls):
-        label_str = str(label)
-        if label_str not in cluster_map:
-            cluster_map[label_str] = []
-        cluster_map[label_str].append(url)
-
-    # Sort keys for cleaner file
-    sorted_cluster_map = dict(sorted(cluster_map.items()))
+    # groupby already yields the keys sorted, for a cleaner file
+    sorted_cluster_map = {
+        cluster: group['URL'].tolist()
+        for cluster, group in df.groupby('Cluster', sort=True)
+    }
 
     with open(filename, 'w') as f:
         json.dump(sorted_cluster_map, f, indent=2)
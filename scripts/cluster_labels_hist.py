@@ -6,14 +6,13 @@
 
 import json
 import sys
-import matplotlib.pyplot as plt
 
 def main():
     # Load the cluster data from stdin
     try:
         # Check if input is being piped
         if sys.stdin.isatty():
-            print("Please pipe JSON data to this script.\nExample: cat clusters.json | uv run cluster_labels_hist.py")
+            print("Please pipe JSON data to this script.\nExample: cat clusters.json | uv run cluster_labels_hist.py [--stats-only]")
             return
         data = json.load(sys.stdin)
     except json.JSONDecodeError:
@@ -39,9 +38,15 @@ def main():
     counts = [len(data[k]) for k in sorted_keys]
     print(counts)
     print(f"total is {sum(counts)}")
+    if "--stats-only" in sys.argv:
+        return
+
     # Create labels that include the Cluster ID
     labels = [f"Cluster {k}: {cluster_labels.get(k, 'Unknown')}" for k in sorted_keys]
 
+    # Only load the (slow to import) plotting stack once we know we need it
+    import matplotlib.pyplot as plt
+
     # Create the horizontal bar chart
     plt.figure(figsize=(12, 8))
     bars = plt.barh(labels, counts, color='skyblue', edgecolor='navy')
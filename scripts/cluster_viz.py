@@ -1,6 +1,8 @@
 # /// script
 # requires-python = ">=3.10"
 # dependencies = [
+#     "ijson",
+#     "joblib",
 #     "numpy",
 #     "pandas",
 #     "plotly",
@@ -9,69 +11,58 @@
 # ///
 
 import sys
-import json
 import numpy as np
 import pandas as pd
 import plotly.express as px
-from sklearn.cluster import KMeans
 from sklearn.decomposition import PCA
+from cluster import fit_kmeans, load_vectors, print_sweep, sample_for_display
 
 # Set default renderer so it works in various environments (terminal, jupyter, etc)
 import plotly.io as pio
 pio.renderers.default = "browser"
 
+# Number of PCA components K-Means clusters on instead of the raw embedding
+CLUSTER_DIMS = 50
+
 def main():
     # --- 1. Data Ingestion ---
-    try:
-        # Read everything from stdin
-        input_data = sys.stdin.read()
-        if not input_data:
-            print("Error: No input received from stdin.", file=sys.stderr)
-            sys.exit(1)
-        
-        records = json.loads(input_data)
-    except json.JSONDecodeError as e:
-        print(f"Error: Invalid JSON format - {e}", file=sys.stderr)
-        sys.exit(1)
-
-    if not records:
-        print("Error: JSON array is empty.", file=sys.stderr)
-        sys.exit(1)
-
-    # Extract vectors and URLs
-    try:
-        vectors = np.array([r["vector"] for r in records])
-        urls = [r["url"] for r in records]
-    except KeyError:
-        print("Error: Input objects must contain 'url' and 'vector' keys.", file=sys.stderr)
-        sys.exit(1)
+    vectors, urls = load_vectors(sys.stdin.buffer)
 
     n_samples, n_features = vectors.shape
     print(f"Processing {n_samples} items with {n_features} dimensions...", file=sys.stderr)
 
-    # --- 2. Clustering (K-Means) ---
+    # --- 2. Dimensionality Reduction (PCA) ---
+    # Reduce once up front: K-Means runs on the leading components, which is
+    # much cheaper than clustering the raw embeddings, and the first two
+    # components double as the 2D plot coordinates.
+    print("Performing dimensionality reduction (PCA)...", file=sys.stderr)
+    if n_features > 2:
+        n_components = min(CLUSTER_DIMS, n_features, max(n_samples, 2))
+        # Randomized SVD only computes the few components we keep
+        pca = PCA(n_components=n_components, svd_solver="randomized", random_state=42)
+        reduced = pca.fit_transform(vectors)
+        coords = reduced[:, :2]
+    elif n_features == 2:
+        # Already 2D
+        reduced = coords = vectors
+    else:
+        # Fallback for 1D data: add a dummy 0 y-axis
+        reduced = vectors
+        coords = np.zeros((n_samples, 2), dtype=vectors.dtype)
+        coords[:, :n_features] = vectors
+
+    # --- 3. Clustering (K-Means) ---
     # Dynamically choose cluster count based on data size (cap at 8 for demo)
     n_clusters = min(8, n_samples)
     if n_samples > 1:
-        # Using k-means++ initialization for better results
-        kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init="auto")
-        labels = kmeans.fit_predict(vectors)
+        # Cached on disk, so re-running on the same data skips the fit
+        labels = fit_kmeans(reduced, n_clusters)
     else:
         # Handle edge case of a single data point
         labels = np.array([0])
 
-    # --- 3. Dimensionality Reduction (PCA) ---
-    # Project high-dimensional vectors down to 2D for plotting
-    print("Performing dimensionality reduction (PCA)...", file=sys.stderr)
-    if n_features > 2:
-        pca = PCA(n_components=2)
-        coords = pca.fit_transform(vectors)
-    elif n_features == 2:
-        # Already 2D
-        coords = vectors
-    else:
-        # Fallback for 1D data: add a dummy 0 y-axis
-        coords = np.column_stack((vectors, np.zeros_like(vectors)))
+    if "--sweep" in sys.argv and n_samples > 1:
+        print_sweep(reduced)
 
     # --- 4. Data Preparation for Plotly ---
     # Combine results into a Pandas DataFrame. This is the easiest way
@@ -88,6 +79,9 @@ def main():
     # Sort by cluster ID so the legend looks tidy
     df = df.sort_values('Cluster ID')
 
+    # Only plot a stratified sample of very large inputs
+    df = sample_for_display(df, 'Cluster ID')
+
     # --- 5. Interactive Visualization ---
     print("Generating interactive plot...", file=sys.stderr)
 
@@ -109,7 +103,9 @@ def main():
         # Use a distinct color palette suited for categorical data
         color_discrete_sequence=px.colors.qualitative.G10,
         template="plotly_white",
-        height=800
+        height=800,
+        # Draw with WebGL; SVG slows to a crawl past a few thousand points
+        render_mode='webgl'
     )
 
     # Make the markers slightly larger and give them a border for visibility
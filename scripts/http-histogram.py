@@ -26,7 +26,7 @@ fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 6))
 
 # Plot 1: 200 OK vs Failed (all failures summed)
 success_count = data.get("200", 0)
-failed_count = sum(count for code, count in data.items() if code != "200")
+failed_count = sum(data.values()) - success_count
 
 plot1_data = pd.DataFrame({
     'Category': ['200 OK', 'Failed'],
@@ -43,12 +43,12 @@ for i, (category, count) in enumerate(zip(plot1_data['Category'], plot1_data['Co
     ax1.text(i, count, str(count), ha='center', va='bottom', fontweight='bold')
 
 # Plot 2: Individual failure cases (excluding 200)
-failure_data = {code: count for code, count in data.items() if code != "200"}
-plot2_df = pd.DataFrame(list(failure_data.items()), columns=['Status Code', 'Count'])
-
 # Sort by status code (with "dead" at the end)
-plot2_df['sort_key'] = plot2_df['Status Code'].apply(lambda x: 999 if x == 'dead' else int(x))
-plot2_df = plot2_df.sort_values('sort_key').drop('sort_key', axis=1)
+failure_data = sorted(
+    ((code, count) for code, count in data.items() if code != "200"),
+    key=lambda item: float('inf') if item[0] == 'dead' else int(item[0])
+)
+plot2_df = pd.DataFrame(failure_data, columns=['Status Code', 'Count'])
 
 sns.barplot(data=plot2_df, x='Status Code', y='Count', palette='viridis', ax=ax2)
 ax2.set_title('Individual Failure Cases', fontsize=14, fontweight='bold')
@@ -1,6 +1,8 @@
 # /// script
 # requires-python = ">=3.10"
 # dependencies = [
+#     "numba",
+#     "numpy",
 #     "sqlite-utils",
 # ]
 # ///
@@ -9,6 +11,71 @@ import sqlite_utils
 import argparse
 import sys
 import math
+import numpy as np
+from numba import njit
+
+@njit(cache=True)
+def whitespace_width(buf, i):
+    """
+    Returns the length in bytes of the whitespace character starting at
+    buf[i], or 0 if it isn't whitespace. Covers exactly the characters that
+    str.split() splits on, including multi-byte ones like U+00A0 (NBSP).
+    """
+    b = buf[i]
+    if (9 <= b <= 13) or (28 <= b <= 32):
+        return 1
+    n = len(buf)
+    if b == 0xC2 and i + 1 < n:
+        # U+0085 (next line), U+00A0 (no-break space)
+        if buf[i + 1] == 0x85 or buf[i + 1] == 0xA0:
+            return 2
+    elif b == 0xE1 and i + 2 < n:
+        # U+1680 (ogham space mark)
+        if buf[i + 1] == 0x9A and buf[i + 2] == 0x80:
+            return 3
+    elif b == 0xE2 and i + 2 < n:
+        c = buf[i + 2]
+        # U+2000..U+200A, U+2028, U+2029, U+202F
+        if buf[i + 1] == 0x80 and (c <= 0x8A or c == 0xA8 or c == 0xA9 or c == 0xAF):
+            return 3
+        # U+205F (medium mathematical space)
+        if buf[i + 1] == 0x81 and c == 0x9F:
+            return 3
+    elif b == 0xE3 and i + 2 < n:
+        # U+3000 (ideographic space)
+        if buf[i + 1] == 0x80 and buf[i + 2] == 0x80:
+            return 3
+    return 0
+
+@njit(cache=True)
+def count_words(buf):
+    """
+    Counts whitespace-separated words in a UTF-8 byte buffer, matching
+    len(text.split()) on the decoded text.
+    """
+    n = 0
+    in_word = False
+    i = 0
+    while i < len(buf):
+        width = whitespace_width(buf, i)
+        if width:
+            in_word = False
+            i += width
+            continue
+        if not in_word:
+            n += 1
+            in_word = True
+        i += 1
+    return n
+
+def blob_word_count(content):
+    """
+    SQLite function wrapping count_words; expects the column cast to a BLOB
+    so the text reaches us as raw bytes without being decoded.
+    """
+    if not content:
+        return 0
+    return count_words(np.frombuffer(content, dtype=np.uint8))
 
 def calculate_reading_time(word_count, wpm=200):
     """
@@ -40,6 +107,10 @@ def main():
     # Check if file exists to give a better error message
     try:
         db = sqlite_utils.Database(args.db_path)
+        # Read the markdown through memory-mapped I/O and a large page cache
+        db.conn.executescript(
+            "PRAGMA cache_size=-262144; PRAGMA mmap_size=1073741824; PRAGMA temp_store=MEMORY;"
+        )
     except Exception as e:
         print(f"Error opening database: {e}")
         sys.exit(1)
@@ -51,15 +122,17 @@ def main():
         print(f"Error: Table '{table_name}' not found in database.")
         sys.exit(1)
 
-    total_words = 0
+    # Count words inside SQLite so the markdown never has to be shipped back
+    # as a result set
+    db.conn.create_function("word_count", 1, blob_word_count, deterministic=True)
+
     try:
-        # iterate over rows where status is 'unread'
-        for row in db[table_name].rows_where("status = ?", ["unread"]):
-            content = row.get(column_name)
-            if content and isinstance(content, str):
-                # Split by whitespace to count words
-                words = content.split()
-                total_words += len(words)
+        # sum over rows where status is 'unread'
+        total_words = db.conn.execute(
+            f"SELECT SUM(word_count(CAST([{column_name}] AS BLOB))) FROM [{table_name}] "
+            f"WHERE status = ? AND [{column_name}] IS NOT NULL",
+            ["unread"],
+        ).fetchone()[0] or 0
     except Exception as e:
         print(f"Error processing rows: {e}")
         sys.exit(1)
@@ -16,62 +16,101 @@ showing the frequency of each tag.
 """
 
 import sys
-from collections import Counter
 from sqlite_utils import Database
-import seaborn as sns
-import matplotlib.pyplot as plt
 
 
-def get_tags_from_database(db_path: str) -> list[str]:
+TOP_N = 20
+
+# Split the comma-separated tags column with a recursive CTE and count them
+# inside SQLite. The window aggregates carry the totals over all tags along
+# with the top rows, so only TOP_N rows ever reach Python.
+TAG_COUNTS_SQL = """
+WITH RECURSIVE split(tag, rest) AS (
+    SELECT '', tags || ',' FROM items WHERE tags IS NOT NULL AND tags != ''
+    UNION ALL
+    SELECT trim(substr(rest, 1, instr(rest, ',') - 1), ' ' || char(9, 10, 11, 12, 13)),
+           substr(rest, instr(rest, ',') + 1)
+    FROM split WHERE rest != ''
+),
+counts AS (
+    SELECT tag, COUNT(*) AS count FROM split WHERE tag != '' GROUP BY tag
+)
+SELECT tag, count, SUM(count) OVER (), COUNT(*) OVER ()
+FROM counts
+ORDER BY count DESC, tag
+LIMIT ?
+"""
+
+
+def get_tag_counts_from_database(
+    db_path: str, top_n: int = TOP_N
+) -> tuple[list[tuple[str, int]], int, int]:
     """
-    Extract all tags from the database.
+    Count tag frequencies in the database.
     
     Args:
         db_path: Path to the SQLite database
+        top_n: Number of most frequent tags to return
         
     Returns:
-        List of individual tags
+        Tuple of (most frequent (tag, count) pairs, total tags, unique tags)
     """
     db = Database(db_path)
+    # Larger cache, mmap and in-memory temp storage for the recursive CTE
+    db.conn.executescript(
+        "PRAGMA cache_size=-262144; PRAGMA mmap_size=1073741824; PRAGMA temp_store=MEMORY;"
+    )
+    
+    rows = db.execute(TAG_COUNTS_SQL, [top_n]).fetchall()
+    if not rows:
+        return [], 0, 0
     
-    # Get all rows from the item table
-    items = db["items"].rows
+    sorted_tags = [(tag, count) for tag, count, _, _ in rows]
+    _, _, total_tags, unique_tags = rows[0]
     
-    # Collect all tags
-    all_tags = []
-    for item in items:
-        tags_string = item.get("tags", "")
-        if tags_string:
-            # Split by comma and strip whitespace
-            tags = [tag.strip() for tag in tags_string.split(",") if tag.strip()]
-            all_tags.extend(tags)
+    return sorted_tags, total_tags, unique_tags
+
+
+def print_summary(
+    sorted_tags: list[tuple[str, int]], total_tags: int, unique_tags: int
+):
+    """
+    Print summary statistics about the tags.
     
-    return all_tags
+    Args:
+        sorted_tags: (tag, count) pairs sorted by descending frequency
+        total_tags: Number of tag occurrences across all items
+        unique_tags: Number of distinct tags across all items
+    """
+    print(f"\nSummary Statistics:")
+    print(f"  Total tags: {total_tags}")
+    print(f"  Unique tags: {unique_tags}")
+    print(f"  Most common tag: '{sorted_tags[0][0]}' ({sorted_tags[0][1]} occurrences)")
+    print(f"  Least common tag: '{sorted_tags[-1][0]}' ({sorted_tags[-1][1]} occurrences)")
 
 
-def create_histogram(tags: list[str], output_file: str = "tag_histogram.png"):
+def create_histogram(
+    sorted_tags: list[tuple[str, int]],
+    total_tags: int,
+    unique_tags: int,
+    output_file: str = "tag_histogram.png",
+):
     """
     Create a visual histogram of tag frequencies using seaborn.
     
     Args:
-        tags: List of tags to analyze
+        sorted_tags: (tag, count) pairs sorted by descending frequency
+        total_tags: Number of tag occurrences across all items
+        unique_tags: Number of distinct tags across all items
         output_file: Path to save the histogram image
     """
-    if not tags:
+    if not sorted_tags:
         print("No tags found in the database.")
         return
     
-    # Count tag frequencies
-    tag_counts = Counter(tags)
-    
-    # Sort by frequency (descending)
-    sorted_tags = sorted(tag_counts.items(), key=lambda x: (-x[1], x[0]))
-    
-    # Limit to top 20 tags for readability
-    top_n = 20
-    if len(sorted_tags) > top_n:
-        sorted_tags = sorted_tags[:top_n]
-        title_suffix = f" (Top {top_n})"
+    # Only the top tags are plotted for readability
+    if unique_tags > len(sorted_tags):
+        title_suffix = f" (Top {len(sorted_tags)})"
     else:
         title_suffix = ""
     
@@ -79,6 +118,11 @@ def create_histogram(tags: list[str], output_file: str = "tag_histogram.png"):
     tag_names = [tag for tag, _ in sorted_tags]
     counts = [count for _, count in sorted_tags]
     
+    # Imported here because the plotting stack is slow to load and
+    # isn't needed for --stats-only
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    
     # Set up the plot style
     sns.set_theme(style="whitegrid")
     
@@ -92,7 +136,7 @@ def create_histogram(tags: list[str], output_file: str = "tag_histogram.png"):
     ax.set_xlabel("Count", fontsize=12, fontweight='bold')
     ax.set_ylabel("Tag", fontsize=12, fontweight='bold')
     ax.set_title(f"Tag Frequency Histogram{title_suffix}\n"
-                 f"Total tags: {len(tags)}, Unique tags: {len(tag_counts)}", 
+                 f"Total tags: {total_tags}, Unique tags: {unique_tags}", 
                  fontsize=14, fontweight='bold', pad=20)
     
     # Add count labels on the bars
@@ -107,11 +151,7 @@ def create_histogram(tags: list[str], output_file: str = "tag_histogram.png"):
     print(f"\nHistogram saved to: {output_file}")
     
     # Display summary statistics
-    print(f"\nSummary Statistics:")
-    print(f"  Total tags: {len(tags)}")
-    print(f"  Unique tags: {len(tag_counts)}")
-    print(f"  Most common tag: '{sorted_tags[0][0]}' ({sorted_tags[0][1]} occurrences)")
-    print(f"  Least common tag: '{sorted_tags[-1][0]}' ({sorted_tags[-1][1]} occurrences)")
+    print_summary(sorted_tags, total_tags, unique_tags)
     
     # Optionally display the plot
     # plt.show()  # Uncomment to display interactively
@@ -119,19 +159,28 @@ def create_histogram(tags: list[str], output_file: str = "tag_histogram.png"):
 
 def main():
     """Main function to run the script."""
-    if len(sys.argv) < 2:
-        print("Usage: uv run tag_histogram.py <database_path> [output_file]")
+    stats_only = "--stats-only" in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != "--stats-only"]
+    
+    if len(args) < 1:
+        print("Usage: uv run tag_histogram.py <database_path> [output_file] [--stats-only]")
         print("\nExample: uv run tag_histogram.py mydata.db")
         print("         uv run tag_histogram.py mydata.db my_histogram.png")
+        print("         uv run tag_histogram.py mydata.db --stats-only")
         sys.exit(1)
     
-    db_path = sys.argv[1]
-    output_file = sys.argv[2] if len(sys.argv) > 2 else "tag_histogram.png"
+    db_path = args[0]
+    output_file = args[1] if len(args) > 1 else "tag_histogram.png"
     
     try:
         print(f"Reading tags from: {db_path}")
-        tags = get_tags_from_database(db_path)
-        create_histogram(tags, output_file)
+        sorted_tags, total_tags, unique_tags = get_tag_counts_from_database(db_path)
+        if not stats_only:
+            create_histogram(sorted_tags, total_tags, unique_tags, output_file)
+        elif sorted_tags:
+            print_summary(sorted_tags, total_tags, unique_tags)
+        else:
+            print("No tags found in the database.")
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)